@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """Nockbot - Telegram Bot."""
 import asyncio
+import heapq
 import json
 import logging
-from datetime import datetime
+import os
+import time
+from collections import deque
+from dataclasses import asdict
+from functools import lru_cache
+from statistics import pstdev
 from pathlib import Path
 from typing import Optional
 
@@ -13,6 +19,7 @@ from telegram import (
     BotCommandScopeDefault, BotCommandScopeAllPrivateChats, BotCommandScopeAllGroupChats
 )
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     CallbackQueryHandler,
@@ -24,8 +31,16 @@ from telegram.ext import (
     filters,
 )
 from telegram.constants import ParseMode, ChatMemberStatus
-from uuid import uuid4
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from telegram.error import ChatMigrated, Forbidden
+from telegram.request import HTTPXRequest
+from itertools import count
+
+# uvloop gives a faster event loop on Linux; the bot runs fine without it
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 from config import (
     TELEGRAM_BOT_TOKEN,
@@ -36,7 +51,10 @@ from config import (
     SUBSCRIPTION_PRICE_STARS,
     SUBSCRIPTION_DURATION_DAYS,
 )
+import scraper
 from scraper import get_metrics, get_tip, get_24h_volume, MiningMetrics
+import db
+from db import Subscription
 
 # Configure logging
 logging.basicConfig(
@@ -46,7 +64,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Persistence files
-SUBSCRIBERS_FILE = Path(__file__).parent / "subscribers.json"
+SUBSCRIBERS_DB = Path(__file__).parent / "subscribers.db"
+LEGACY_SUBSCRIBERS_FILE = Path(__file__).parent / "subscribers.json"
+STATE_FILE = Path(__file__).parent / "state.json"
 
 # Lifetime subscriber expiry value (0 = never expires)
 LIFETIME_EXPIRY = 0
@@ -55,44 +75,182 @@ LIFETIME_EXPIRY = 0
 TYPE_USER = "user"
 TYPE_GROUP = "group"
 
-def load_subscribers() -> dict[int, dict]:
-    """Load all subscribers from disk.
-    
-    File format: {"subscribers": {"id": {"type", "expiry", "floor", "ceiling"}, ...}}
+# SQLite connection, opened by load_subscribers() at import time
+_db_conn = None
+
+
+def _migrate_legacy_json(conn) -> None:
+    """One-shot migration from the old subscribers.json file into SQLite."""
+    try:
+        with open(LEGACY_SUBSCRIBERS_FILE, "r") as f:
+            data = json.load(f)
+        legacy = {}
+        for k, v in data.get("subscribers", {}).items():
+            # Oldest schema stored a bare expiry int; normalize once here so
+            # nothing downstream needs isinstance checks
+            if not isinstance(v, dict):
+                legacy[int(k)] = Subscription(type=TYPE_USER, expiry=int(v))
+            else:
+                legacy[int(k)] = Subscription(
+                    type=v.get("type", TYPE_USER),
+                    expiry=v.get("expiry", 0),
+                    floor=v.get("floor"),
+                    ceiling=v.get("ceiling"),
+                )
+    except (json.JSONDecodeError, IOError, TypeError, ValueError) as e:
+        logger.error(f"Failed to migrate legacy subscribers file: {e}")
+        return
+
+    db.upsert_many(conn, legacy.items())
+    os.replace(LEGACY_SUBSCRIBERS_FILE, LEGACY_SUBSCRIBERS_FILE.with_suffix(".json.bak"))
+    logger.info(f"Migrated {len(legacy)} subscribers from JSON to SQLite")
+
+
+def load_subscribers() -> dict[int, Subscription]:
+    """Load all subscribers from the SQLite store into memory.
+
+    Reads go against the in-memory dict; writes are O(1) row updates
+    flushed in the background (see schedule_save).
     """
-    if SUBSCRIBERS_FILE.exists():
-        try:
-            with open(SUBSCRIBERS_FILE, "r") as f:
-                data = json.load(f)
-                return {int(k): v for k, v in data.get("subscribers", {}).items()}
-        except (json.JSONDecodeError, IOError, TypeError, ValueError) as e:
-            logger.error(f"Failed to load subscribers: {e}")
-    return {}
+    global _db_conn
+    _db_conn = db.connect(SUBSCRIBERS_DB)
+    if LEGACY_SUBSCRIBERS_FILE.exists():
+        _migrate_legacy_json(_db_conn)
+    return db.load_all(_db_conn)
 
 
-def save_subscribers() -> None:
-    """Save subscribers to disk."""
+# Debounce window for coalescing subscriber writes (seconds)
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+_save_dirty = asyncio.Event()
+_save_flusher_task: Optional[asyncio.Task] = None
+_dirty_ids: set[int] = set()
+_deleted_ids: set[int] = set()
+
+
+# Bumped on every subscriber mutation so the monitor can tell whether a
+# tick with an unchanged proofrate could possibly produce new alerts
+_sub_version = 0
+
+
+def schedule_save(sub_id: int, deleted: bool = False) -> None:
+    """Mark a subscriber row dirty; the background flusher writes it shortly.
+
+    Coalesces bursts of mutations (e.g. a flood of /setalerts) into a single
+    batched row write instead of touching the database on every change.
+    """
+    global _sub_version
+    _sub_version += 1
+    if deleted:
+        _dirty_ids.discard(sub_id)
+        _deleted_ids.add(sub_id)
+    else:
+        _deleted_ids.discard(sub_id)
+        _dirty_ids.add(sub_id)
+    _save_dirty.set()
+
+
+def _snapshot_pending() -> tuple[list[tuple[int, Subscription]], list[int]]:
+    """Capture and clear the pending mutation sets.
+
+    Must run on the event loop: handlers mutate _dirty_ids/_deleted_ids
+    via schedule_save, and snapshotting from a worker thread would race
+    them — a mutation landing between the copy and the clear would be
+    silently dropped.
+    """
+    upserts = [(sub_id, subscribers[sub_id]) for sub_id in _dirty_ids if sub_id in subscribers]
+    deletes = list(_deleted_ids)
+    _dirty_ids.clear()
+    _deleted_ids.clear()
+    return upserts, deletes
+
+
+def _write_pending(upserts: list[tuple[int, Subscription]], deletes: list[int]) -> None:
+    """Write an already-captured batch of mutations to SQLite."""
     try:
-        with open(SUBSCRIBERS_FILE, "w") as f:
-            json.dump({"subscribers": subscribers}, f)
-    except IOError as e:
+        if upserts:
+            db.upsert_many(_db_conn, upserts)
+        if deletes:
+            db.delete_many(_db_conn, deletes)
+    except Exception as e:
         logger.error(f"Failed to save subscribers: {e}")
 
 
-def is_subscription_active(user_id: int) -> bool:
+def save_subscribers() -> None:
+    """Flush all pending subscriber mutations to SQLite synchronously."""
+    upserts, deletes = _snapshot_pending()
+    _write_pending(upserts, deletes)
+
+
+async def _save_flusher() -> None:
+    """Background task that flushes dirty subscriber rows off the event loop."""
+    while True:
+        try:
+            await _save_dirty.wait()
+            await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
+            _save_dirty.clear()
+            # Snapshot on the loop, hand only the captured lists to the thread
+            upserts, deletes = _snapshot_pending()
+            await asyncio.to_thread(_write_pending, upserts, deletes)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # One failed flush must not kill the persistence task
+            logger.error(f"Subscriber flusher error: {e}")
+
+
+# Timestamp formats for user-facing messages. time.strftime over gmtime is a
+# thin libc call and avoids allocating a datetime per formatted message.
+UTC_MINUTE_FMT = "%Y-%m-%d %H:%M UTC"
+UTC_SECOND_FMT = "%Y-%m-%d %H:%M:%S UTC"
+
+
+@lru_cache(maxsize=1024)
+def _fmt_utc(ts: int, fmt: str = UTC_MINUTE_FMT) -> str:
+    """Format a unix timestamp as a UTC string.
+
+    The two formats the bot actually uses are rendered with plain %
+    formatting over the gmtime tuple — no datetime allocation and no
+    strftime locale machinery. Cached because the same expiry/block
+    timestamps are formatted repeatedly within a short window.
+    """
+    t = time.gmtime(ts)
+    if fmt == UTC_MINUTE_FMT:
+        return "%04d-%02d-%02d %02d:%02d UTC" % t[:5]
+    if fmt == UTC_SECOND_FMT:
+        return "%04d-%02d-%02d %02d:%02d:%02d UTC" % t[:6]
+    return time.strftime(fmt, t)
+
+
+@lru_cache(maxsize=1024)
+def _format_age(seconds_ago: int) -> str:
+    """Render a block age like "5m 12s ago"."""
+    if seconds_ago < 0:
+        return "just now"
+    if seconds_ago < 60:
+        return f"{seconds_ago}s ago"
+    if seconds_ago < 3600:
+        return f"{seconds_ago // 60}m {seconds_ago % 60}s ago"
+    return f"{seconds_ago // 3600}h {(seconds_ago % 3600) // 60}m ago"
+
+
+def is_subscription_active(user_id: int, now: Optional[int] = None) -> bool:
     """Check if a user has an active subscription.
-    
+
     expiry = 0 means lifetime subscription (never expires).
+    Pass `now` to reuse one timestamp across many checks (monitor tick).
     """
-    import time
+    # Fast path: lifetime subscribers (the common case) are one set lookup
+    if user_id in _lifetime_ids:
+        return True
     sub = subscribers.get(user_id)
     if sub is None:
         return False
-    expiry = sub.get("expiry", 0) if isinstance(sub, dict) else sub
+    expiry = sub.expiry
     # Lifetime subscribers have expiry = 0
     if expiry == LIFETIME_EXPIRY:
         return True
-    return expiry > int(time.time())
+    return expiry > (now if now is not None else int(time.time()))
 
 
 def get_subscription_expiry(user_id: int) -> Optional[int]:
@@ -100,21 +258,19 @@ def get_subscription_expiry(user_id: int) -> Optional[int]:
     sub = subscribers.get(user_id)
     if sub is None:
         return None
-    return sub.get("expiry") if isinstance(sub, dict) else sub
+    return sub.expiry
 
 
 def get_user_thresholds(user_id: int) -> tuple[float, float]:
     """Get the floor and ceiling thresholds for a user. Returns (floor, ceiling).
-    
+
     Uses custom values if set, otherwise falls back to global defaults.
     """
-    sub = subscribers.get(user_id, {})
-    if isinstance(sub, dict):
-        floor = sub.get("floor") if sub.get("floor") is not None else PROOFRATE_ALERT_FLOOR
-        ceiling = sub.get("ceiling") if sub.get("ceiling") is not None else PROOFRATE_ALERT_CEILING
-    else:
-        floor = PROOFRATE_ALERT_FLOOR
-        ceiling = PROOFRATE_ALERT_CEILING
+    sub = subscribers.get(user_id)
+    if sub is None:
+        return (PROOFRATE_ALERT_FLOOR, PROOFRATE_ALERT_CEILING)
+    floor = sub.floor if sub.floor is not None else PROOFRATE_ALERT_FLOOR
+    ceiling = sub.ceiling if sub.ceiling is not None else PROOFRATE_ALERT_CEILING
     return (floor, ceiling)
 
 
@@ -122,40 +278,34 @@ def set_user_thresholds(user_id: int, floor: Optional[float] = None, ceiling: Op
     """Set custom thresholds for a user. Pass None to reset to default."""
     if user_id not in subscribers:
         return
-    
+
     sub = subscribers[user_id]
-    if not isinstance(sub, dict):
-        sub = {"expiry": sub, "floor": None, "ceiling": None}
-        subscribers[user_id] = sub
-    
     if floor is not None:
-        sub["floor"] = floor
+        sub.floor = floor
     if ceiling is not None:
-        sub["ceiling"] = ceiling
+        sub.ceiling = ceiling
     
-    save_subscribers()
+    schedule_save(user_id)
 
 
 def activate_subscription(user_id: int, days: int = SUBSCRIPTION_DURATION_DAYS) -> int:
     """Activate or extend a subscription. Returns new expiry timestamp."""
-    import time
-    
-    sub = subscribers.get(user_id, {})
-    if isinstance(sub, dict):
-        current_expiry = sub.get("expiry", 0)
-    else:
-        current_expiry = sub
-        sub = {"expiry": 0, "floor": None, "ceiling": None}
     
+    sub = subscribers.get(user_id)
+    if sub is None:
+        sub = Subscription(type=TYPE_USER)
+    current_expiry = sub.expiry
+
     now = int(time.time())
     
     # If current subscription is still active, extend from expiry; otherwise start from now
     base_time = max(current_expiry, now)
     new_expiry = base_time + (days * 24 * 60 * 60)
     
-    sub["expiry"] = new_expiry
+    sub.expiry = new_expiry
     subscribers[user_id] = sub
-    save_subscribers()
+    _index_add(user_id, sub)
+    schedule_save(user_id)
     return new_expiry
 
 
@@ -163,75 +313,330 @@ def activate_subscription(user_id: int, days: int = SUBSCRIPTION_DURATION_DAYS)
 last_metrics: Optional[MiningMetrics] = None
 floor_alert_triggered = False
 ceiling_alert_triggered = False
-user_alert_state: dict[int, dict] = {}  # Per-user alert state: {user_id: {"floor_triggered": bool, "ceiling_triggered": bool}}
+# Per-user alert state as a 2-bit mask; small ints are interned by
+# CPython so this costs a dict slot per user and nothing more
+FLOOR_TRIGGERED = 0b01
+CEILING_TRIGGERED = 0b10
+
+user_alert_state: dict[int, int] = {}
 subscribers = load_subscribers()
 
+# Incremental indexes over `subscribers`, maintained on mutation so hot
+# paths (/status, alert broadcasts) don't rescan the full dict
+_group_ids: set[int] = set()
+_lifetime_ids: set[int] = set()
+_timed_ids: set[int] = set()
+
+# Min-heap of (expiry, user_id) for timed subscriptions, so expirations are
+# handled in O(log N) pops instead of rescanning every subscriber per tick.
+# Lifetime subs (expiry=0) are never pushed; renewed entries go stale and
+# are skipped when popped.
+_expiry_heap: list[tuple[int, int]] = []
+
+
+def _expire_due(now: int) -> None:
+    """Drop subscribers whose expiry has passed from the active indexes."""
+    while _expiry_heap and _expiry_heap[0][0] <= now:
+        expiry, user_id = heapq.heappop(_expiry_heap)
+        sub = subscribers.get(user_id)
+        if sub is not None and sub.expiry == expiry:
+            _timed_ids.discard(user_id)
+            user_alert_state.pop(user_id, None)
+
+
+# Alert recipients (static chat ids + group chats), rebuilt lazily after
+# any membership change instead of re-unioned every monitor tick
+_ALERT_CHAT_IDS = frozenset(ALERT_CHAT_IDS)
+_recipients_cache: Optional[frozenset] = None
+
+
+def _alert_recipients() -> frozenset:
+    global _recipients_cache
+    if _recipients_cache is None:
+        _recipients_cache = _ALERT_CHAT_IDS | _group_ids
+    return _recipients_cache
+
+
+def _index_add(sub_id: int, sub: Subscription) -> None:
+    """Add or refresh a subscriber in the type/expiry indexes."""
+    global _recipients_cache
+    _index_remove(sub_id)
+    if sub.type == TYPE_GROUP:
+        _group_ids.add(sub_id)
+        _recipients_cache = None
+    elif sub.expiry == LIFETIME_EXPIRY:
+        _lifetime_ids.add(sub_id)
+    else:
+        _timed_ids.add(sub_id)
+        heapq.heappush(_expiry_heap, (sub.expiry, sub_id))
 
-def get_group_chats() -> set[int]:
-    """Get all group chat IDs from subscribers."""
+
+def _index_remove(sub_id: int) -> None:
+    """Remove a subscriber from all indexes."""
+    global _recipients_cache
+    if sub_id in _group_ids:
+        _group_ids.discard(sub_id)
+        _recipients_cache = None
+    _lifetime_ids.discard(sub_id)
+    _timed_ids.discard(sub_id)
+
+
+def _rebuild_indexes() -> None:
+    """Repopulate the indexes from scratch (startup only)."""
+    for sub_id, sub in subscribers.items():
+        _index_add(sub_id, sub)
+
+
+_rebuild_indexes()
+
+
+def _load_state() -> None:
+    """Restore monitor state saved by the previous run.
+
+    Without this, a restart forgets which alerts already fired and the
+    first tick re-broadcasts them all; it also leaves /status empty
+    until the monitor has run once.
+    """
+    global last_metrics, floor_alert_triggered, ceiling_alert_triggered
+    try:
+        with open(STATE_FILE, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return
+    except IOError as e:
+        logger.warning(f"Could not read {STATE_FILE}: {e}")
+        return
+    saved_metrics = data.get("last_metrics")
+    if saved_metrics:
+        try:
+            last_metrics = MiningMetrics(**saved_metrics)
+        except TypeError:
+            # Field set changed since the state was written; start fresh
+            last_metrics = None
+    floor_alert_triggered = bool(data.get("floor_alert_triggered", False))
+    ceiling_alert_triggered = bool(data.get("ceiling_alert_triggered", False))
+    # JSON keys are strings; restore the int chat ids
+    for user_id, state in data.get("user_alert_state", {}).items():
+        user_alert_state[int(user_id)] = state
+
+
+def _state_snapshot() -> dict:
+    """Build the state payload from copies, not live references.
+
+    Must run on the event loop: handlers mutate user_alert_state, and
+    json.dump iterating the live dict from a worker thread would race
+    them.
+    """
     return {
-        sub_id for sub_id, sub in subscribers.items()
-        if sub.get("type") == TYPE_GROUP
+        "last_metrics": asdict(last_metrics) if last_metrics else None,
+        "floor_alert_triggered": floor_alert_triggered,
+        "ceiling_alert_triggered": ceiling_alert_triggered,
+        "user_alert_state": dict(user_alert_state),
     }
 
 
-def get_user_subscribers() -> dict[int, dict]:
-    """Get all user subscribers (not groups) from subscribers."""
+def _write_state(data: dict) -> None:
+    """Write an already-built state payload to STATE_FILE atomically."""
+    tmp = STATE_FILE.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, STATE_FILE)
+
+
+def _save_state() -> None:
+    """Snapshot last_metrics and the alert flags to STATE_FILE."""
+    _write_state(_state_snapshot())
+
+
+_load_state()
+
+
+def get_group_chats() -> set[int]:
+    """Get all group chat IDs from subscribers."""
+    return _group_ids
+
+
+def get_user_subscribers() -> dict[int, Subscription]:
+    """Get all user subscribers (not groups) from subscribers.
+
+    Built from the type-partitioned index sets, so the cost scales with
+    the number of users rather than the full subscriber table.
+    """
     return {
-        sub_id: sub for sub_id, sub in subscribers.items()
-        if sub.get("type") == TYPE_USER
+        sub_id: subscribers[sub_id]
+        for sub_id in _lifetime_ids | _timed_ids
     }
 
 
+def iter_active_subscribers(now: int):
+    """Yield (user_id, sub) for user subscribers active at `now`.
+
+    Takes the timestamp as an argument so the monitor computes it once
+    per tick instead of once per subscriber.
+    """
+    for user_id in _lifetime_ids:
+        yield user_id, subscribers[user_id]
+    for user_id in _timed_ids:
+        sub = subscribers[user_id]
+        if sub.expiry > now:
+            yield user_id, sub
+
+
+# Static message texts and keyboards, built once at import time instead of
+# per command invocation (the price/duration config never changes at runtime)
+GROUP_START_TEXT = (
+    "👋 <b>Hi! I'm Nockbot.</b>\n\n"
+    "Tap the button below to start a private conversation where you can:\n"
+    "• Subscribe to alerts\n"
+    "• Set custom thresholds\n\n"
+    "You can still use /proofrate, /tip, and /volume here to get the latest metrics!"
+)
+
+START_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📊 Get Proofrate", callback_data="proofrate")],
+    [
+        InlineKeyboardButton(f"⭐ Subscribe ({SUBSCRIPTION_PRICE_STARS} Stars)", callback_data="subscribe"),
+        InlineKeyboardButton("💎 Lifetime (1000 ℕOCK)", url="https://t.me/nocktoshi"),
+    ],
+    [InlineKeyboardButton("ℹ️ Help", callback_data="help")],
+])
+
+START_TEXT = (
+    "⛏️ <b>Nockbot</b>\n\n"
+    "I track the proofrate and mining metrics for the Nockchain network.\n\n"
+    "<b>📊 Free Commands:</b>\n"
+    "• /proofrate - Get current mining metrics\n"
+    "• /tip - Get latest block info\n"
+    "• /volume - Get 24h transaction volume\n\n"
+    "<b>⭐ Premium Alerts:</b>\n"
+    "• /subscribe - Get alerts when proofrate changes\n"
+    "• /subscription - Check status &amp; set thresholds\n"
+    "• /setalerts - Configure floor/ceiling\n\n"
+    "<b>💰 Pricing:</b>\n"
+    f"• ⭐ {SUBSCRIPTION_PRICE_STARS} Stars = {SUBSCRIPTION_DURATION_DAYS} days\n"
+    "• 💎 1000 ℕOCK = LIFETIME (DM @nocktoshi)\n"
+)
+
+HELP_TEXT = (
+    "⛏️ <b>Nockbot - Help</b>\n\n"
+    "<b>📊 Free Commands:</b>\n\n"
+    "<b>/proofrate</b>\n"
+    "Get current network mining metrics including:\n"
+    "• Current difficulty\n"
+    "• Network proofrate (hashrate)\n"
+    "• Average block time\n"
+    "• Epoch progress\n\n"
+    "<b>/tip</b>\n"
+    "Get the latest block info:\n"
+    "• Block height and epoch\n"
+    "• Timestamp and age\n"
+    "• Block hash\n\n"
+    "<b>/volume</b>\n"
+    "Get 24-hour transaction volume:\n"
+    "• Total NOCK transferred\n"
+    "• Transaction count\n"
+    "• Block count\n\n"
+    "<b>/status</b>\n"
+    "Check bot status and subscriber count\n\n"
+    "━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    "<b>⭐ Premium Alerts:</b>\n\n"
+    "<b>/subscribe</b>\n"
+    "Subscribe for automatic alerts (sent to your DMs)\n\n"
+    "<b>/subscription</b>\n"
+    "Check your subscription status and thresholds\n\n"
+    "<b>/setalerts</b> &lt;floor&gt; &lt;ceiling&gt;\n"
+    "Set custom alert thresholds (e.g., /setalerts 0.5 3.0)\n\n"
+    "<b>/resetalerts</b>\n"
+    "Reset thresholds to defaults\n\n"
+    "<b>/unsubscribe</b>\n"
+    "Cancel your subscription\n\n"
+    "━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    "<b>💰 Pricing:</b>\n"
+    f"• ⭐ {SUBSCRIPTION_PRICE_STARS} Stars = {SUBSCRIPTION_DURATION_DAYS} days\n"
+    "• 💎 1000 ℕOCK = LIFETIME (DM @nocktoshi)\n"
+)
+
+
+# Invoice pieces are constant after import; only the payload is per-user
+INVOICE_TITLE = "Nockbot Pro Subscription"
+INVOICE_DESCRIPTION = (
+    f"📊 {SUBSCRIPTION_DURATION_DAYS}-day subscription\n\n"
+    f"✓ 24/7 proofrate monitoring\n"
+    f"✓ Custom alert thresholds\n"
+    f"✓ Alerts below {PROOFRATE_ALERT_FLOOR} MP/s or above {PROOFRATE_ALERT_CEILING} MP/s\n"
+    f"✓ Direct DM notifications\n\n"
+    f"💎 Want LIFETIME? Pay 1000 ℕOCK - DM @nocktoshi"
+)
+INVOICE_PRICES = [LabeledPrice(f"{SUBSCRIPTION_DURATION_DAYS}-day alerts", SUBSCRIPTION_PRICE_STARS)]
+
+# Command lists registered at startup (https://core.telegram.org/bots/api#setmycommands)
+# Private chats get the full feature set
+_COMMANDS_PRIVATE = (
+    BotCommand("start", "Start the bot and see options"),
+    BotCommand("proofrate", "Get current mining metrics"),
+    BotCommand("tip", "Get latest block info"),
+    BotCommand("volume", "Get 24h transaction volume"),
+    BotCommand("subscribe", "Subscribe to proofrate alerts"),
+    BotCommand("subscription", "Check your subscription status"),
+    BotCommand("setalerts", "Set custom alert thresholds"),
+    BotCommand("resetalerts", "Reset to default thresholds"),
+    BotCommand("unsubscribe", "Stop receiving alerts"),
+    BotCommand("status", "Check bot status"),
+    BotCommand("help", "Show all commands"),
+)
+
+# Group chats get info commands only (no subscription management)
+_COMMANDS_GROUP = (
+    BotCommand("start", "Start private chat with bot"),
+    BotCommand("proofrate", "Get current mining metrics"),
+    BotCommand("tip", "Get latest block info"),
+    BotCommand("volume", "Get 24h transaction volume"),
+    BotCommand("status", "Check bot status"),
+    BotCommand("help", "Show all commands"),
+)
+
+
+async def send_subscription_invoice(bot, chat_id: int, user_id: int) -> None:
+    """Send the Telegram Stars subscription invoice to a chat."""
+    await bot.send_invoice(
+        chat_id=chat_id,
+        title=INVOICE_TITLE,
+        description=INVOICE_DESCRIPTION,
+        payload=f"subscription_{user_id}_{SUBSCRIPTION_DURATION_DAYS}",
+        provider_token="",  # Empty for Telegram Stars
+        currency="XTR",  # Telegram Stars
+        prices=INVOICE_PRICES,
+    )
+
+
+@lru_cache(maxsize=4)
+def _deep_link_markup(bot_username: str, start_param: str, label: str) -> InlineKeyboardMarkup:
+    """Build (once per bot username) a button deep-linking into private chat."""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(label, url=f"https://t.me/{bot_username}?start={start_param}")],
+    ])
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command."""
     chat_type = update.effective_chat.type
-    
+
     # If in a group, redirect to private chat
     if chat_type in ["group", "supergroup"]:
         bot_username = (await context.bot.get_me()).username
-        keyboard = [
-            [InlineKeyboardButton("💬 Start Private Chat", url=f"https://t.me/{bot_username}?start=welcome")],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _deep_link_markup(bot_username, "welcome", "💬 Start Private Chat")
         await update.message.reply_text(
-            "👋 <b>Hi! I'm Nockbot.</b>\n\n"
-            "Tap the button below to start a private conversation where you can:\n"
-            "• Subscribe to alerts\n"
-            "• Set custom thresholds\n\n"
-            "You can still use /proofrate, /tip, and /volume here to get the latest metrics!",
+            GROUP_START_TEXT,
             parse_mode=ParseMode.HTML,
             reply_markup=reply_markup,
         )
         return
-    
+
     # Private chat - show full menu
-    keyboard = [
-        [InlineKeyboardButton("📊 Get Proofrate", callback_data="proofrate")],
-        [
-            InlineKeyboardButton(f"⭐ Subscribe ({SUBSCRIPTION_PRICE_STARS} Stars)", callback_data="subscribe"),
-            InlineKeyboardButton("💎 Lifetime (1000 ℕOCK)", url="https://t.me/nocktoshi"),
-        ],
-        [InlineKeyboardButton("ℹ️ Help", callback_data="help")],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await update.message.reply_text(
-        "⛏️ <b>Nockbot</b>\n\n"
-        "I track the proofrate and mining metrics for the Nockchain network.\n\n"
-        "<b>📊 Free Commands:</b>\n"
-        "• /proofrate - Get current mining metrics\n"
-        "• /tip - Get latest block info\n"
-        "• /volume - Get 24h transaction volume\n\n"
-        "<b>⭐ Premium Alerts:</b>\n"
-        "• /subscribe - Get alerts when proofrate changes\n"
-        "• /subscription - Check status &amp; set thresholds\n"
-        "• /setalerts - Configure floor/ceiling\n\n"
-        "<b>💰 Pricing:</b>\n"
-        f"• ⭐ {SUBSCRIPTION_PRICE_STARS} Stars = {SUBSCRIPTION_DURATION_DAYS} days\n"
-        "• 💎 1000 ℕOCK = LIFETIME (DM @nocktoshi)\n",
+        START_TEXT,
         parse_mode=ParseMode.HTML,
-        reply_markup=reply_markup,
+        reply_markup=START_KEYBOARD,
         disable_web_page_preview=True,
     )
 
@@ -239,42 +644,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /help command."""
     await update.message.reply_text(
-        "⛏️ <b>Nockbot - Help</b>\n\n"
-        "<b>📊 Free Commands:</b>\n\n"
-        "<b>/proofrate</b>\n"
-        "Get current network mining metrics including:\n"
-        "• Current difficulty\n"
-        "• Network proofrate (hashrate)\n"
-        "• Average block time\n"
-        "• Epoch progress\n\n"
-        "<b>/tip</b>\n"
-        "Get the latest block info:\n"
-        "• Block height and epoch\n"
-        "• Timestamp and age\n"
-        "• Block hash\n\n"
-        "<b>/volume</b>\n"
-        "Get 24-hour transaction volume:\n"
-        "• Total NOCK transferred\n"
-        "• Transaction count\n"
-        "• Block count\n\n"
-        "<b>/status</b>\n"
-        "Check bot status and subscriber count\n\n"
-        "━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        "<b>⭐ Premium Alerts:</b>\n\n"
-        "<b>/subscribe</b>\n"
-        "Subscribe for automatic alerts (sent to your DMs)\n\n"
-        "<b>/subscription</b>\n"
-        "Check your subscription status and thresholds\n\n"
-        "<b>/setalerts</b> &lt;floor&gt; &lt;ceiling&gt;\n"
-        "Set custom alert thresholds (e.g., /setalerts 0.5 3.0)\n\n"
-        "<b>/resetalerts</b>\n"
-        "Reset thresholds to defaults\n\n"
-        "<b>/unsubscribe</b>\n"
-        "Cancel your subscription\n\n"
-        "━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        "<b>💰 Pricing:</b>\n"
-        f"• ⭐ {SUBSCRIPTION_PRICE_STARS} Stars = {SUBSCRIPTION_DURATION_DAYS} days\n"
-        "• 💎 1000 ℕOCK = LIFETIME (DM @nocktoshi)\n",
+        HELP_TEXT,
         parse_mode=ParseMode.HTML,
         disable_web_page_preview=True,
     )
@@ -313,10 +683,7 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     # If in a group, redirect to private chat
     if chat_type in ["group", "supergroup"]:
         bot_username = (await context.bot.get_me()).username
-        keyboard = [
-            [InlineKeyboardButton("⭐ Set Alerts in Private Chat", url=f"https://t.me/{bot_username}?start=subscribe")],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _deep_link_markup(bot_username, "subscribe", "⭐ Set Alerts in Private Chat")
         await update.message.reply_text(
             "🔔 <b>Set Alerts</b>\n\n"
             "Alerts must be managed in private chat.\n"
@@ -345,14 +712,12 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                 parse_mode=ParseMode.HTML,
             )
         else:
-            from datetime import datetime, timezone
-            expiry_dt = datetime.fromtimestamp(expiry, tz=timezone.utc)
-            days_left = (expiry - int(datetime.now(timezone.utc).timestamp())) // (24 * 60 * 60)
+            days_left = (expiry - int(time.time())) // (24 * 60 * 60)
             
             await update.message.reply_text(
                 "✅ <b>You're Already Subscribed!</b>\n\n"
                 f"Your subscription is active until:\n"
-                f"<code>{expiry_dt.strftime('%Y-%m-%d %H:%M UTC')}</code>\n"
+                f"<code>{_fmt_utc(expiry)}</code>\n"
                 f"({days_left} days remaining)\n\n"
                 "You'll receive alerts when:\n"
                 f"• Proofrate drops below {PROOFRATE_ALERT_FLOOR} MP/s\n"
@@ -363,40 +728,22 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
     
     # Send invoice directly
-    await context.bot.send_invoice(
-        chat_id=chat_id,
-        title="Nockbot Pro Subscription",
-        description=(
-            f"📊 {SUBSCRIPTION_DURATION_DAYS}-day subscription\n\n"
-            f"✓ 24/7 proofrate monitoring\n"
-            f"✓ Custom alert thresholds\n"
-            f"✓ Alerts below {PROOFRATE_ALERT_FLOOR} MP/s or above {PROOFRATE_ALERT_CEILING} MP/s\n"
-            f"✓ Direct DM notifications\n\n"
-            f"💎 Want LIFETIME? Pay 1000 ℕOCK - DM @nocktoshi"
-        ),
-        payload=f"subscription_{user_id}_{SUBSCRIPTION_DURATION_DAYS}",
-        provider_token="",  # Empty for Telegram Stars
-        currency="XTR",  # Telegram Stars
-        prices=[LabeledPrice(f"{SUBSCRIPTION_DURATION_DAYS}-day alerts", SUBSCRIPTION_PRICE_STARS)],
-    )
+    await send_subscription_invoice(context.bot, chat_id, user_id)
 
 async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /unsubscribe command - unsubscribes the user."""
     user_id = update.effective_user.id
     
-    was_subscribed = user_id in subscribers
-    was_lifetime = False
+    # Remove from subscribers (single lookup via pop)
+    prev = subscribers.pop(user_id, None)
+    was_subscribed = prev is not None
+    was_lifetime = was_subscribed and prev.expiry == LIFETIME_EXPIRY
     if was_subscribed:
-        was_lifetime = subscribers[user_id].get("expiry") == LIFETIME_EXPIRY
-    
-    # Remove from subscribers
-    if user_id in subscribers:
-        del subscribers[user_id]
-        save_subscribers()
-    
+        _index_remove(user_id)
+        schedule_save(user_id, deleted=True)
+
     # Clear alert state so re-subscribing starts fresh
-    if user_id in user_alert_state:
-        del user_alert_state[user_id]
+    user_alert_state.pop(user_id, None)
     
     if was_lifetime:
         await update.message.reply_text(
@@ -425,42 +772,33 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /status command."""
     global last_metrics
     
-    # Count active subscribers by type
-    import time
+    # Count active subscribers from the incremental indexes
     now = int(time.time())
-    user_lifetime = 0
-    user_timed = 0
-    group_count = 0
-    
-    for sub in subscribers.values():
-        sub_type = sub.get("type", TYPE_USER)
-        expiry = sub.get("expiry", 0) if isinstance(sub, dict) else sub
-        
-        if sub_type == TYPE_GROUP:
-            group_count += 1
-        elif expiry == LIFETIME_EXPIRY:
-            user_lifetime += 1
-        elif expiry > now:
-            user_timed += 1
-    
+    _expire_due(now)
+    user_lifetime = len(_lifetime_ids)
+    user_timed = len(_timed_ids)
+    group_count = len(_group_ids)
+
     total_users = user_lifetime + user_timed
     
-    status_text = "📡 <b>Bot Status</b>\n\n"
-    status_text += f"• Monitoring: <code>Active</code>\n"
-    status_text += f"• Check Interval: <code>{MONITOR_INTERVAL_MINUTES} min</code>\n"
-    status_text += f"• Default Floor: <code>{PROOFRATE_ALERT_FLOOR} MP/s</code>\n"
-    status_text += f"• Default Ceiling: <code>{PROOFRATE_ALERT_CEILING} MP/s</code>\n"
-    status_text += f"• Subscribers: <code>{total_users}</code> ({user_lifetime} lifetime, {user_timed} timed)\n"
-    status_text += f"• Group Chats: <code>{group_count}</code>\n\n"
-    
+    parts = [
+        "📡 <b>Bot Status</b>\n\n",
+        "• Monitoring: <code>Active</code>\n",
+        f"• Check Interval: <code>{MONITOR_INTERVAL_MINUTES} min</code>\n",
+        f"• Default Floor: <code>{PROOFRATE_ALERT_FLOOR} MP/s</code>\n",
+        f"• Default Ceiling: <code>{PROOFRATE_ALERT_CEILING} MP/s</code>\n",
+        f"• Subscribers: <code>{total_users}</code> ({user_lifetime} lifetime, {user_timed} timed)\n",
+        f"• Group Chats: <code>{group_count}</code>\n\n",
+    ]
+
     if last_metrics:
-        status_text += f"<b>Last Known Metrics:</b>\n"
-        status_text += f"• Proofrate: <code>{last_metrics.proofrate}</code>\n"
-        status_text += f"• Block: <code>{last_metrics.latest_block}</code>\n"
+        parts.append("<b>Last Known Metrics:</b>\n")
+        parts.append(f"• Proofrate: <code>{last_metrics.proofrate}</code>\n")
+        parts.append(f"• Block: <code>{last_metrics.latest_block}</code>\n")
     else:
-        status_text += "<i>No metrics cached yet. Use /proofrate to fetch.</i>"
-    
-    await update.message.reply_text(status_text, parse_mode=ParseMode.HTML)
+        parts.append("<i>No metrics cached yet. Use /proofrate to fetch.</i>")
+
+    await update.message.reply_text("".join(parts), parse_mode=ParseMode.HTML)
 
 
 async def subscription(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -468,15 +806,13 @@ async def subscription(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     
     if is_subscription_active(user_id):
-        from datetime import datetime, timezone
-        import time
         expiry = get_subscription_expiry(user_id)
         
         # Get user's custom thresholds
         floor, ceiling = get_user_thresholds(user_id)
-        sub = subscribers.get(user_id, {})
-        custom_floor = sub.get("floor") if isinstance(sub, dict) else None
-        custom_ceiling = sub.get("ceiling") if isinstance(sub, dict) else None
+        sub = subscribers.get(user_id)
+        custom_floor = sub.floor if sub else None
+        custom_ceiling = sub.ceiling if sub else None
         
         floor_str = f"<code>{floor} MP/s</code>" + (" (custom)" if custom_floor else " (default)")
         ceiling_str = f"<code>{ceiling} MP/s</code>" + (" (custom)" if custom_ceiling else " (default)")
@@ -497,14 +833,14 @@ async def subscription(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 parse_mode=ParseMode.HTML,
             )
         else:
-            expiry_dt = datetime.fromtimestamp(expiry, tz=timezone.utc)
-            days_left = (expiry - int(time.time())) // (24 * 60 * 60)
-            hours_left = ((expiry - int(time.time())) % (24 * 60 * 60)) // 3600
+            now = int(time.time())
+            days_left = (expiry - now) // (24 * 60 * 60)
+            hours_left = ((expiry - now) % (24 * 60 * 60)) // 3600
             
             await update.message.reply_text(
                 "✅ <b>Subscription Active</b>\n\n"
                 f"<b>Status:</b> Active\n"
-                f"<b>Expires:</b> <code>{expiry_dt.strftime('%Y-%m-%d %H:%M UTC')}</code>\n"
+                f"<b>Expires:</b> <code>{_fmt_utc(expiry)}</code>\n"
                 f"<b>Time left:</b> {days_left} days, {hours_left} hours\n\n"
                 "<b>Alert Thresholds:</b>\n"
                 f"• Floor: {floor_str}\n"
@@ -519,12 +855,10 @@ async def subscription(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         # Check if they have an expired subscription
         expiry = get_subscription_expiry(user_id)
         if expiry:
-            from datetime import datetime, timezone
-            expiry_dt = datetime.fromtimestamp(expiry, tz=timezone.utc)
             await update.message.reply_text(
                 "❌ <b>Subscription Expired</b>\n\n"
                 f"Your subscription expired on:\n"
-                f"<code>{expiry_dt.strftime('%Y-%m-%d %H:%M UTC')}</code>\n\n"
+                f"<code>{_fmt_utc(expiry)}</code>\n\n"
                 "Use /subscribe to renew.",
                 parse_mode=ParseMode.HTML,
             )
@@ -600,8 +934,7 @@ async def setalerts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     set_user_thresholds(user_id, floor=floor, ceiling=ceiling)
     
     # Reset user's alert state to trigger fresh alerts
-    if user_id in user_alert_state:
-        del user_alert_state[user_id]
+    user_alert_state.pop(user_id, None)
     
     await update.message.reply_text(
         "✅ <b>Thresholds Updated!</b>\n\n"
@@ -625,15 +958,14 @@ async def resetalerts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
     
     # Reset thresholds to None (will use defaults)
-    sub = subscribers.get(user_id, {})
-    if isinstance(sub, dict):
-        sub["floor"] = None
-        sub["ceiling"] = None
-        save_subscribers()
+    sub = subscribers.get(user_id)
+    if sub is not None:
+        sub.floor = None
+        sub.ceiling = None
+        schedule_save(user_id)
     
     # Reset alert state
-    if user_id in user_alert_state:
-        del user_alert_state[user_id]
+    user_alert_state.pop(user_id, None)
     
     await update.message.reply_text(
         "✅ <b>Thresholds Reset!</b>\n\n"
@@ -658,22 +990,9 @@ async def tip(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         
         # Format timestamp
         if timestamp:
-            from datetime import datetime, timezone
-            import time
-            
-            dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-            time_str = dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-            
-            # Calculate time ago using current UTC time
-            seconds_ago = int(time.time() - timestamp)
-            if seconds_ago < 0:
-                ago_str = "just now"
-            elif seconds_ago < 60:
-                ago_str = f"{seconds_ago}s ago"
-            elif seconds_ago < 3600:
-                ago_str = f"{seconds_ago // 60}m {seconds_ago % 60}s ago"
-            else:
-                ago_str = f"{seconds_ago // 3600}h {(seconds_ago % 3600) // 60}m ago"
+            time_str = _fmt_utc(timestamp, UTC_SECOND_FMT)
+            # Age relative to current UTC time
+            ago_str = _format_age(int(time.time() - timestamp))
         else:
             time_str = "N/A"
             ago_str = ""
@@ -729,71 +1048,75 @@ async def volume(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
 
 
-async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle button callbacks."""
+async def _cb_hashrate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Proofrate button: fetch and reply with current metrics."""
     query = update.callback_query
-    await query.answer()
-    
-    if query.data == "hashrate" or query.data == "proofrate":
-        await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
-        metrics = await get_metrics()
-        if metrics:
-            global last_metrics
-            previous_proofrate = last_metrics.proofrate_value if last_metrics else None
-            last_metrics = metrics
+    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+    metrics = await get_metrics()
+    if metrics:
+        global last_metrics
+        previous_proofrate = last_metrics.proofrate_value if last_metrics else None
+        last_metrics = metrics
+        await query.message.reply_text(
+            metrics.format_message(previous_proofrate),
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,
+        )
+    else:
+        await query.message.reply_text(
+            "❌ Could not fetch metrics. Try again later.",
+            parse_mode=ParseMode.HTML,
+        )
+
+
+async def _cb_subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Subscribe button: send the payment invoice or current status."""
+    query = update.callback_query
+    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
+
+    if is_subscription_active(user_id):
+        expiry = get_subscription_expiry(user_id)
+        if expiry == LIFETIME_EXPIRY:
             await query.message.reply_text(
-                metrics.format_message(previous_proofrate),
+                "✅ You already have a lifetime subscription!",
                 parse_mode=ParseMode.HTML,
-                disable_web_page_preview=True,
             )
         else:
             await query.message.reply_text(
-                "❌ Could not fetch metrics. Try again later.",
+                f"✅ You already have an active subscription until {_fmt_utc(expiry)}",
                 parse_mode=ParseMode.HTML,
             )
-    
-    elif query.data == "subscribe":
-        # Send payment invoice directly
-        user_id = update.effective_user.id
-        chat_id = update.effective_chat.id
-        
-        if is_subscription_active(user_id):
-            expiry = get_subscription_expiry(user_id)
-            if expiry == LIFETIME_EXPIRY:
-                await query.message.reply_text(
-                    "✅ You already have a lifetime subscription!",
-                    parse_mode=ParseMode.HTML,
-                )
-            else:
-                from datetime import datetime, timezone
-                expiry_dt = datetime.fromtimestamp(expiry, tz=timezone.utc)
-                await query.message.reply_text(
-                    f"✅ You already have an active subscription until {expiry_dt.strftime('%Y-%m-%d %H:%M UTC')}",
-                    parse_mode=ParseMode.HTML,
-                )
-        else:
-            await context.bot.send_invoice(
-                chat_id=chat_id,
-                title="Nockbot Pro Subscription",
-                description=(
-                    f"📊 {SUBSCRIPTION_DURATION_DAYS}-day subscription\n\n"
-                    f"✓ 24/7 proofrate monitoring\n"
-                    f"✓ Custom alert thresholds\n"
-                    f"✓ Alerts below {PROOFRATE_ALERT_FLOOR} MP/s or above {PROOFRATE_ALERT_CEILING} MP/s\n"
-                    f"✓ Direct DM notifications\n\n"
-                    f"💎 Want LIFETIME? Pay 1000 ℕOCK - DM @nocktoshi"
-                ),
-                payload=f"subscription_{user_id}_{SUBSCRIPTION_DURATION_DAYS}",
-                provider_token="",  # Empty for Telegram Stars
-                currency="XTR",  # Telegram Stars
-                prices=[LabeledPrice(f"{SUBSCRIPTION_DURATION_DAYS}-day alerts", SUBSCRIPTION_PRICE_STARS)],
-            )
-    
-    elif query.data == "help":
-        await query.message.reply_text(
-            "Use /help to see all available commands.",
-            parse_mode=ParseMode.HTML,
-        )
+    else:
+        await send_subscription_invoice(context.bot, chat_id, user_id)
+
+
+async def _cb_help(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Help button: point at the /help command."""
+    await update.callback_query.message.reply_text(
+        "Use /help to see all available commands.",
+        parse_mode=ParseMode.HTML,
+    )
+
+
+# Dispatch table for button callbacks, built once instead of an if/elif
+# chain of string comparisons per tap
+_CALLBACK_HANDLERS = {
+    "hashrate": _cb_hashrate,
+    "proofrate": _cb_hashrate,
+    "subscribe": _cb_subscribe,
+    "help": _cb_help,
+}
+
+
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle button callbacks."""
+    query = update.callback_query
+    await query.answer()
+
+    handler = _CALLBACK_HANDLERS.get(query.data)
+    if handler is not None:
+        await handler(update, context)
 
 
 async def precheckout_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -814,29 +1137,29 @@ async def successful_payment_callback(update: Update, context: ContextTypes.DEFA
     payment = update.message.successful_payment
     user_id = update.effective_user.id
     
-    # Parse payload to get duration (if custom durations are added later)
-    payload_parts = payment.invoice_payload.split("_")
+    # Parse the duration off the "subscription_{user_id}_{days}" payload;
+    # rpartition avoids the list allocation split() would make per payment
     days = SUBSCRIPTION_DURATION_DAYS
-    if len(payload_parts) >= 3:
+    head, _, tail = payment.invoice_payload.rpartition("_")
+    if "_" in head:  # payload has all three segments
         try:
-            days = int(payload_parts[2])
+            days = int(tail)
         except ValueError:
             pass
     
     # Activate subscription
     new_expiry = activate_subscription(user_id, days)
     
-    from datetime import datetime, timezone
-    expiry_dt = datetime.fromtimestamp(new_expiry, tz=timezone.utc)
+    expiry_str = _fmt_utc(new_expiry)
     
-    logger.info(f"New subscription: user {user_id}, expires {expiry_dt}, paid {payment.total_amount} Stars")
+    logger.info(f"New subscription: user {user_id}, expires {expiry_str}, paid {payment.total_amount} Stars")
     
     await update.message.reply_text(
         "🎉 <b>Payment Successful!</b>\n\n"
         f"Thank you for subscribing to Nockbot Pro!\n\n"
         f"<b>Subscription Details:</b>\n"
         f"• Duration: {days} days\n"
-        f"• Expires: <code>{expiry_dt.strftime('%Y-%m-%d %H:%M UTC')}</code>\n"
+        f"• Expires: <code>{expiry_str}</code>\n"
         f"• Stars paid: ⭐ {payment.total_amount}\n\n"
         "<b>You will now receive alerts direct to your DMs when:</b>\n"
         f"• Proofrate drops below {PROOFRATE_ALERT_FLOOR} MP/s\n"
@@ -847,94 +1170,166 @@ async def successful_payment_callback(update: Update, context: ContextTypes.DEFA
     )
 
 
+# Built inline articles are reused for a short window; the upstream data
+# is itself TTL-cached, so this mainly skips re-serializing the HTML bodies
+INLINE_CACHE_TTL = 15
+_inline_cache: dict[str, tuple[float, InlineQueryResultArticle]] = {}
+
+# Result ids only need to be unique within one answer; a counter is far
+# cheaper than uuid4 (which reads urandom per result)
+_inline_seq = count()
+
+
+async def _build_metrics_article() -> Optional[InlineQueryResultArticle]:
+    metrics = await get_metrics()
+    if not metrics:
+        return None
+    previous_proofrate = last_metrics.proofrate_value if last_metrics else None
+    return InlineQueryResultArticle(
+        id=str(next(_inline_seq)),
+        title="📊 Mining Metrics",
+        description=f"Proofrate: {metrics.proofrate} | Difficulty: {metrics.difficulty}",
+        input_message_content=InputTextMessageContent(
+            metrics.format_message(previous_proofrate),
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,
+        ),
+    )
+
+
+async def _build_tip_article() -> Optional[InlineQueryResultArticle]:
+    block = await get_tip()
+    if not block:
+        return None
+    height = block.get("height", "N/A")
+    timestamp = block.get("timestamp", 0)
+    digest = block.get("digest", "N/A")
+    epoch = block.get("epochCounter", "N/A")
+
+    if timestamp:
+        time_str = _fmt_utc(timestamp, UTC_SECOND_FMT)
+    else:
+        time_str = "N/A"
+
+    message = (
+        f"🧊 <b>Latest Block</b>\n\n"
+        f"├ Height: <code>{height}</code>\n"
+        f"├ Epoch: <code>{epoch}</code>\n"
+        f"├ Time: <code>{time_str}</code>\n"
+        f"└ Hash: <code>{digest[:16]}...</code>\n\n"
+        f"🔗 <a href='https://nockblocks.com/block/{height}'>View on NockBlocks</a>"
+    )
+
+    return InlineQueryResultArticle(
+        id=str(next(_inline_seq)),
+        title="🧊 Latest Block",
+        description=f"Block #{height} | Epoch {epoch}",
+        input_message_content=InputTextMessageContent(
+            message,
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,
+        ),
+    )
+
+
+async def _build_volume_article() -> Optional[InlineQueryResultArticle]:
+    data = await get_24h_volume()
+    if not data:
+        return None
+    vol = data['volume_nock']
+    tx_count = data['tx_count']
+    block_count = data['block_count']
+    vol_str = f"{vol:,.0f}" if vol >= 1000 else f"{vol:,.2f}"
+
+    message = (
+        f"💰 <b>24h Transaction Volume</b>\n\n"
+        f"├ Volume: <code>{vol_str} NOCK</code>\n"
+        f"├ Transactions: <code>{tx_count}</code>\n"
+        f"└ Blocks: <code>{block_count}</code>\n\n"
+        f"🔗 <a href='https://nockblocks.com/metrics'>View on NockBlocks</a>"
+    )
+
+    return InlineQueryResultArticle(
+        id=str(next(_inline_seq)),
+        title="💰 24h Volume",
+        description=f"{vol_str} NOCK | {tx_count} transactions",
+        input_message_content=InputTextMessageContent(
+            message,
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,
+        ),
+    )
+
+
+# Inline intents matched by keyword prefix, replacing the old substring-in-
+# string checks ("hash" in "hashrate") with an explicit keyword table
+_INTENTS = {
+    "metrics": ("hashrate", "proofrate", "metrics", "hash"),
+    "tip": ("tip", "block", "latest"),
+    "volume": ("volume", "transactions", "24h", "tx"),
+}
+
+
+# Uppercase->lowercase table for the ASCII fast path below
+_ASCII_LOWER = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"
+)
+
+
+def _normalize_query(query: str) -> str:
+    """Lowercase and strip an inline query.
+
+    Inline queries are almost always short ASCII keywords; translate
+    skips str.lower()'s Unicode case-folding machinery for those.
+    """
+    if query.isascii():
+        return query.translate(_ASCII_LOWER).strip()
+    return query.lower().strip()
+
+
+def _match_intents(query: str) -> set[str]:
+    """Return the intents whose keywords start with the typed query."""
+    if not query:
+        return set(_INTENTS)
+    return {
+        intent
+        for intent, keywords in _INTENTS.items()
+        if any(kw.startswith(query) for kw in keywords)
+    }
+
+
+async def _cached_article(intent: str, builder) -> Optional[InlineQueryResultArticle]:
+    """Return the cached article for an intent, rebuilding after the TTL."""
+    now = time.monotonic()
+    hit = _inline_cache.get(intent)
+    if hit is not None and now - hit[0] < INLINE_CACHE_TTL:
+        return hit[1]
+    article = await builder()
+    if article is not None:
+        _inline_cache[intent] = (now, article)
+    return article
+
+
 async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle inline queries - allows users to query the bot from any chat."""
-    query = update.inline_query.query.lower().strip()
+    query = _normalize_query(update.inline_query.query)
+    matched = _match_intents(query)
     results = []
     
-    # Always show available options
-    if not query or query in "hashrate" or query in "proofrate" or query in "metrics":
-        metrics = await get_metrics()
-        if metrics:
-            previous_proofrate = last_metrics.proofrate_value if last_metrics else None
-            results.append(
-                InlineQueryResultArticle(
-                    id=str(uuid4()),
-                    title="📊 Mining Metrics",
-                    description=f"Proofrate: {metrics.proofrate} | Difficulty: {metrics.difficulty}",
-                    input_message_content=InputTextMessageContent(
-                        metrics.format_message(previous_proofrate),
-                        parse_mode=ParseMode.HTML,
-                        disable_web_page_preview=True,
-                    ),
-                )
-            )
+    if "metrics" in matched:
+        article = await _cached_article("metrics", _build_metrics_article)
+        if article:
+            results.append(article)
     
-    if not query or query in "tip" or query in "block" or query in "latest":
-        block = await get_tip()
-        if block:
-            from datetime import datetime, timezone
-            height = block.get("height", "N/A")
-            timestamp = block.get("timestamp", 0)
-            digest = block.get("digest", "N/A")
-            epoch = block.get("epochCounter", "N/A")
-            
-            if timestamp:
-                dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-                time_str = dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-            else:
-                time_str = "N/A"
-            
-            message = (
-                f"🧊 <b>Latest Block</b>\n\n"
-                f"├ Height: <code>{height}</code>\n"
-                f"├ Epoch: <code>{epoch}</code>\n"
-                f"├ Time: <code>{time_str}</code>\n"
-                f"└ Hash: <code>{digest[:16]}...</code>\n\n"
-                f"🔗 <a href='https://nockblocks.com/block/{height}'>View on NockBlocks</a>"
-            )
-            
-            results.append(
-                InlineQueryResultArticle(
-                    id=str(uuid4()),
-                    title="🧊 Latest Block",
-                    description=f"Block #{height} | Epoch {epoch}",
-                    input_message_content=InputTextMessageContent(
-                        message,
-                        parse_mode=ParseMode.HTML,
-                        disable_web_page_preview=True,
-                    ),
-                )
-            )
+    if "tip" in matched:
+        article = await _cached_article("tip", _build_tip_article)
+        if article:
+            results.append(article)
     
-    if not query or query in "volume" or query in "transactions" or query in "24h":
-        data = await get_24h_volume()
-        if data:
-            vol = data['volume_nock']
-            tx_count = data['tx_count']
-            block_count = data['block_count']
-            vol_str = f"{vol:,.0f}" if vol >= 1000 else f"{vol:,.2f}"
-            
-            message = (
-                f"💰 <b>24h Transaction Volume</b>\n\n"
-                f"├ Volume: <code>{vol_str} NOCK</code>\n"
-                f"├ Transactions: <code>{tx_count}</code>\n"
-                f"└ Blocks: <code>{block_count}</code>\n\n"
-                f"🔗 <a href='https://nockblocks.com/metrics'>View on NockBlocks</a>"
-            )
-            
-            results.append(
-                InlineQueryResultArticle(
-                    id=str(uuid4()),
-                    title="💰 24h Volume",
-                    description=f"{vol_str} NOCK | {tx_count} transactions",
-                    input_message_content=InputTextMessageContent(
-                        message,
-                        parse_mode=ParseMode.HTML,
-                        disable_web_page_preview=True,
-                    ),
-                )
-            )
+    if "volume" in matched:
+        article = await _cached_article("volume", _build_volume_article)
+        if article:
+            results.append(article)
     
     await update.inline_query.answer(results, cache_time=60)
 
@@ -954,36 +1349,141 @@ async def track_chat_membership(update: Update, context: ContextTypes.DEFAULT_TY
     
     if new_status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR]:
         # Bot was added to group
-        if chat.id not in subscribers or subscribers[chat.id].get("type") != TYPE_GROUP:
-            subscribers[chat.id] = {
-                "type": TYPE_GROUP,
-                "expiry": LIFETIME_EXPIRY,
-                "floor": None,
-                "ceiling": None
-            }
-            save_subscribers()
+        if chat.id not in subscribers or subscribers[chat.id].type != TYPE_GROUP:
+            subscribers[chat.id] = Subscription(type=TYPE_GROUP, expiry=LIFETIME_EXPIRY)
+            _index_add(chat.id, subscribers[chat.id])
+            schedule_save(chat.id)
             logger.info(f"Bot added to group: {chat.title} ({chat.id})")
     elif new_status in [ChatMemberStatus.LEFT, ChatMemberStatus.BANNED]:
         # Bot was removed from group
-        if chat.id in subscribers and subscribers[chat.id].get("type") == TYPE_GROUP:
+        if chat.id in subscribers and subscribers[chat.id].type == TYPE_GROUP:
             del subscribers[chat.id]
-            save_subscribers()
+            _index_remove(chat.id)
+            schedule_save(chat.id, deleted=True)
             logger.info(f"Bot removed from group: {chat.title} ({chat.id})")
 
 
-async def send_alert(app: Application, chat_id: int, message: str) -> bool:
-    """Send an alert message to a chat. Returns True if successful."""
-    try:
-        await app.bot.send_message(
-            chat_id=chat_id,
-            text=message,
-            parse_mode=ParseMode.HTML,
-            disable_web_page_preview=True,
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send alert to {chat_id}: {e}")
-        return False
+async def send_alert(app: Application, chat_id: int, message: str) -> None:
+    """Send an alert message to a chat. Failures propagate to the caller."""
+    await app.bot.send_message(
+        chat_id=chat_id,
+        text=message,
+        parse_mode=ParseMode.HTML,
+        disable_web_page_preview=True,
+    )
+
+# The four alert bodies share one shape; keep the templates at module
+# scope and fill them per broadcast instead of re-parsing eight inline
+# f-strings every tick
+_ALERT_TEMPLATES = {
+    "floor": (
+        "🔴 <b>Low Proofrate Alert!</b>\n\n"
+        "Network proofrate has dropped below {whose}{threshold} MP/s\n\n"
+        "Current: <code>{proofrate}</code>\n"
+        "Difficulty: <code>{difficulty}</code>\n\n"
+        "🔗 <a href='https://nockblocks.com/metrics?tab=mining'>View Details</a>"
+    ),
+    "floor_recovery": (
+        "✅ <b>Proofrate Recovered!</b>\n\n"
+        "Network proofrate is back above {whose}{threshold} MP/s\n\n"
+        "Current: <code>{proofrate}</code>\n"
+        "Difficulty: <code>{difficulty}</code>"
+    ),
+    "ceiling": (
+        "🚀 <b>High Proofrate Alert!</b>\n\n"
+        "Network proofrate has risen above {whose}{threshold} MP/s\n\n"
+        "Current: <code>{proofrate}</code>\n"
+        "Difficulty: <code>{difficulty}</code>\n\n"
+        "🔗 <a href='https://nockblocks.com/metrics?tab=mining'>View Details</a>"
+    ),
+    "ceiling_recovery": (
+        "📉 <b>Proofrate Normalized</b>\n\n"
+        "Network proofrate is back below {whose}{threshold} MP/s\n\n"
+        "Current: <code>{proofrate}</code>\n"
+        "Difficulty: <code>{difficulty}</code>"
+    ),
+}
+
+
+def _format_alert(kind: str, threshold: float, metrics: MiningMetrics, personal: bool = True) -> str:
+    """Fill one of the alert templates for a user (personal) or group alert."""
+    return _ALERT_TEMPLATES[kind].format(
+        whose="your threshold of " if personal else "",
+        threshold=threshold,
+        proofrate=metrics.proofrate,
+        difficulty=metrics.difficulty,
+    )
+
+
+# Telegram allows ~30 messages/sec globally; stay just under it
+BROADCAST_CONCURRENCY = 25
+
+
+def _drop_chat(chat_id: int) -> None:
+    """Handle a chat that rejects messages (bot blocked or kicked).
+
+    Only group rows are deleted: a kicked bot holds nothing of value
+    there. User rows stay — blocking is reversible and the subscription
+    was paid for — so unblocking restores service; only the transient
+    alert state is dropped.
+    """
+    sub = subscribers.get(chat_id)
+    if sub is not None and sub.type == TYPE_GROUP:
+        del subscribers[chat_id]
+        _index_remove(chat_id)
+        schedule_save(chat_id, deleted=True)
+    user_alert_state.pop(chat_id, None)
+
+
+def _migrate_chat(old_id: int, new_id: int) -> None:
+    """Re-register a group chat under its new supergroup id."""
+    sub = subscribers.pop(old_id, None)
+    _index_remove(old_id)
+    if sub is None:
+        sub = Subscription(type=TYPE_GROUP, expiry=LIFETIME_EXPIRY)
+    subscribers[new_id] = sub
+    _index_add(new_id, sub)
+    schedule_save(old_id, deleted=True)
+    schedule_save(new_id)
+
+
+async def _broadcast(app: Application, sends: list[tuple[int, str]]) -> None:
+    """Send (chat_id, message) pairs concurrently, bounded by a semaphore.
+
+    Fanning out with gather turns N serial round-trips into roughly
+    N / BROADCAST_CONCURRENCY wall time; return_exceptions isolates
+    per-chat failures so one bad recipient never aborts the batch.
+    """
+    if not sends:
+        return
+    sem = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+
+    async def _bounded(chat_id: int, message: str) -> None:
+        async with sem:
+            await send_alert(app, chat_id, message)
+
+    results = await asyncio.gather(
+        *(_bounded(chat_id, msg) for chat_id, msg in sends),
+        return_exceptions=True,
+    )
+    failures = [
+        (chat_id, result)
+        for (chat_id, _), result in zip(sends, results)
+        if isinstance(result, Exception)
+    ]
+    for chat_id, exc in failures:
+        # Permanent failures prune themselves instead of erroring on
+        # every future tick; anything else is transient and just logged
+        if isinstance(exc, ChatMigrated):
+            _migrate_chat(chat_id, exc.new_chat_id)
+            logger.info(f"Group migrated: {chat_id} -> {exc.new_chat_id}")
+        elif isinstance(exc, Forbidden):
+            _drop_chat(chat_id)
+            logger.info(f"Chat {chat_id} unreachable: bot was blocked or removed")
+        else:
+            logger.error(f"Failed to send alert to {chat_id}: {exc}")
+    if failures:
+        logger.warning(f"Alert broadcast: {len(failures)}/{len(sends)} sends failed")
 
 
 async def check_and_alert(app: Application) -> None:
@@ -999,130 +1499,163 @@ async def check_and_alert(app: Application) -> None:
     
     last_metrics = metrics
     proofrate = metrics.proofrate_value
+    _recent_proofrates.append(proofrate)
     logger.info(f"Current proofrate: {metrics.proofrate} ({proofrate:.3f} MP/s)")
-    
-    import time
+
+    # If the proofrate is exactly what we evaluated last tick and no
+    # subscriber/threshold has changed since, no state transition is
+    # possible — skip the whole evaluation pass
+    global _last_eval_proofrate, _last_eval_version
+    if proofrate == _last_eval_proofrate and _sub_version == _last_eval_version:
+        logger.info("Proofrate and subscribers unchanged; skipping alert evaluation")
+        return
+    _last_eval_proofrate = proofrate
+    _last_eval_version = _sub_version
+
     now = int(time.time())
-    
-    # Process each user subscriber (not groups) with their custom thresholds
-    for user_id, sub in get_user_subscribers().items():
-        # Skip groups - they use global thresholds and are handled separately
-        if sub.get("type") == TYPE_GROUP:
-            continue
-        
-        # Check if subscription is active (expiry=0 means lifetime)
-        expiry = sub.get("expiry", 0) if isinstance(sub, dict) else sub
-        if expiry != LIFETIME_EXPIRY and expiry <= now:
-            continue
-        
-        # Get user's thresholds
-        floor, ceiling = get_user_thresholds(user_id)
-        
-        # Get or create user's alert state
-        if user_id not in user_alert_state:
-            user_alert_state[user_id] = {"floor_triggered": False, "ceiling_triggered": False}
-        
-        state = user_alert_state[user_id]
+    _expire_due(now)
+
+    # Decision pass: collect every (chat_id, message) pair first, then fan
+    # the sends out concurrently at the end
+    sends: list[tuple[int, str]] = []
+
+    # Most users share a handful of thresholds, so render each distinct
+    # alert body once per tick and reuse the same str for every recipient
+    rendered: dict[tuple[str, float], str] = {}
+
+    def render(kind: str, threshold: float) -> str:
+        msg = rendered.get((kind, threshold))
+        if msg is None:
+            msg = _format_alert(kind, threshold, metrics)
+            rendered[(kind, threshold)] = msg
+        return msg
+
+    # Process each active user subscriber (not groups) with their custom thresholds
+    for user_id, sub in iter_active_subscribers(now):
+        # Read thresholds straight off the record already in hand rather
+        # than paying a second dict lookup via get_user_thresholds
+        floor = sub.floor if sub.floor is not None else PROOFRATE_ALERT_FLOOR
+        ceiling = sub.ceiling if sub.ceiling is not None else PROOFRATE_ALERT_CEILING
+
+        state = user_alert_state.get(user_id, 0)
         
         # Check floor alert
-        if proofrate < floor and not state["floor_triggered"]:
-            state["floor_triggered"] = True
-            alert_msg = (
-                f"🔴 <b>Low Proofrate Alert!</b>\n\n"
-                f"Network proofrate has dropped below your threshold of {floor} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>\n\n"
-                f"🔗 <a href='https://nockblocks.com/metrics?tab=mining'>View Details</a>"
-            )
-            await send_alert(app, user_id, alert_msg)
+        if proofrate < floor and not state & FLOOR_TRIGGERED:
+            state |= FLOOR_TRIGGERED
+            sends.append((user_id, render("floor", floor)))
         
         # Floor recovery
-        elif proofrate >= floor and state["floor_triggered"]:
-            state["floor_triggered"] = False
-            recovery_msg = (
-                f"✅ <b>Proofrate Recovered!</b>\n\n"
-                f"Network proofrate is back above your threshold of {floor} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>"
-            )
-            await send_alert(app, user_id, recovery_msg)
+        elif proofrate >= floor and state & FLOOR_TRIGGERED:
+            state &= ~FLOOR_TRIGGERED
+            sends.append((user_id, render("floor_recovery", floor)))
         
         # Check ceiling alert
-        if proofrate > ceiling and not state["ceiling_triggered"]:
-            state["ceiling_triggered"] = True
-            alert_msg = (
-                f"🚀 <b>High Proofrate Alert!</b>\n\n"
-                f"Network proofrate has risen above your threshold of {ceiling} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>\n\n"
-                f"🔗 <a href='https://nockblocks.com/metrics?tab=mining'>View Details</a>"
-            )
-            await send_alert(app, user_id, alert_msg)
+        if proofrate > ceiling and not state & CEILING_TRIGGERED:
+            state |= CEILING_TRIGGERED
+            sends.append((user_id, render("ceiling", ceiling)))
         
         # Ceiling recovery
-        elif proofrate <= ceiling and state["ceiling_triggered"]:
-            state["ceiling_triggered"] = False
-            recovery_msg = (
-                f"📉 <b>Proofrate Normalized</b>\n\n"
-                f"Network proofrate is back below your threshold of {ceiling} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>"
-            )
-            await send_alert(app, user_id, recovery_msg)
+        elif proofrate <= ceiling and state & CEILING_TRIGGERED:
+            state &= ~CEILING_TRIGGERED
+            sends.append((user_id, render("ceiling_recovery", ceiling)))
+        
+        user_alert_state[user_id] = state
     
     # Also alert group chats and ALERT_CHAT_IDS using global thresholds
-    group_recipients = set(ALERT_CHAT_IDS).union(get_group_chats())
+    group_recipients = _alert_recipients()
     
     if group_recipients:
         # Floor alert for groups
         if proofrate < PROOFRATE_ALERT_FLOOR and not floor_alert_triggered:
             floor_alert_triggered = True
-            alert_msg = (
-                f"🔴 <b>Low Proofrate Alert!</b>\n\n"
-                f"Network proofrate has dropped below {PROOFRATE_ALERT_FLOOR} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>\n\n"
-                f"🔗 <a href='https://nockblocks.com/metrics?tab=mining'>View Details</a>"
-            )
-            for chat_id in group_recipients:
-                await send_alert(app, chat_id, alert_msg)
+            alert_msg = _format_alert("floor", PROOFRATE_ALERT_FLOOR, metrics, personal=False)
+            sends.extend((chat_id, alert_msg) for chat_id in group_recipients)
         
         # Floor recovery for groups
         elif proofrate >= PROOFRATE_ALERT_FLOOR and floor_alert_triggered:
             floor_alert_triggered = False
-            recovery_msg = (
-                f"✅ <b>Proofrate Recovered!</b>\n\n"
-                f"Network proofrate is back above {PROOFRATE_ALERT_FLOOR} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>"
-            )
-            for chat_id in group_recipients:
-                await send_alert(app, chat_id, recovery_msg)
+            recovery_msg = _format_alert("floor_recovery", PROOFRATE_ALERT_FLOOR, metrics, personal=False)
+            sends.extend((chat_id, recovery_msg) for chat_id in group_recipients)
         
         # Ceiling alert for groups
         if proofrate > PROOFRATE_ALERT_CEILING and not ceiling_alert_triggered:
             ceiling_alert_triggered = True
-            alert_msg = (
-                f"🚀 <b>High Proofrate Alert!</b>\n\n"
-                f"Network proofrate has risen above {PROOFRATE_ALERT_CEILING} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>\n\n"
-                f"🔗 <a href='https://nockblocks.com/metrics?tab=mining'>View Details</a>"
-            )
-            for chat_id in group_recipients:
-                await send_alert(app, chat_id, alert_msg)
+            alert_msg = _format_alert("ceiling", PROOFRATE_ALERT_CEILING, metrics, personal=False)
+            sends.extend((chat_id, alert_msg) for chat_id in group_recipients)
         
         # Ceiling recovery for groups
         elif proofrate <= PROOFRATE_ALERT_CEILING and ceiling_alert_triggered:
             ceiling_alert_triggered = False
-            recovery_msg = (
-                f"📉 <b>Proofrate Normalized</b>\n\n"
-                f"Network proofrate is back below {PROOFRATE_ALERT_CEILING} MP/s\n\n"
-                f"Current: <code>{metrics.proofrate}</code>\n"
-                f"Difficulty: <code>{metrics.difficulty}</code>"
-            )
-            for chat_id in group_recipients:
-                await send_alert(app, chat_id, recovery_msg)
+            recovery_msg = _format_alert("ceiling_recovery", PROOFRATE_ALERT_CEILING, metrics, personal=False)
+            sends.extend((chat_id, recovery_msg) for chat_id in group_recipients)
+
+    await _broadcast(app, sends)
+
+    # Persist the flags so a restart doesn't re-send the same alerts;
+    # snapshot on the loop, write the copy in the thread
+    await asyncio.to_thread(_write_state, _state_snapshot())
+
+
+_monitor_task: Optional[asyncio.Task] = None
+
+# Last evaluated (proofrate, subscriber version), for the skip fast path
+_last_eval_proofrate: Optional[float] = None
+_last_eval_version = -1
+
+# Recent proofrate samples used to adapt the polling interval
+_recent_proofrates: deque = deque(maxlen=5)
+
+
+def _nearest_threshold_margin(current: float) -> float:
+    """Distance from `current` to the nearest active alert threshold.
+
+    Considers custom per-user floors/ceilings as well as the global
+    band: a paid subscriber's threshold can sit well inside the globals,
+    and backing off the poll is wrong exactly when their margin is
+    tight.
+    """
+    margin = min(current - PROOFRATE_ALERT_FLOOR, PROOFRATE_ALERT_CEILING - current)
+    now = int(time.time())
+    for _, sub in iter_active_subscribers(now):
+        if sub.floor is not None:
+            margin = min(margin, abs(current - sub.floor))
+        if sub.ceiling is not None:
+            margin = min(margin, abs(current - sub.ceiling))
+    return margin
+
+
+def _next_monitor_delay() -> float:
+    """Pick the next poll delay from recent proofrate volatility.
+
+    When the last few samples are steady and sit comfortably clear of
+    every active threshold, the upstream API is polled at twice the base
+    interval; any volatility or drift toward a threshold drops straight
+    back to MONITOR_INTERVAL_MINUTES.
+    """
+    base = MONITOR_INTERVAL_MINUTES * 60
+    if len(_recent_proofrates) < _recent_proofrates.maxlen:
+        return base
+    current = _recent_proofrates[-1]
+    spread = pstdev(_recent_proofrates)
+    margin = _nearest_threshold_margin(current)
+    if margin > 3 * spread and margin > 0.2 * PROOFRATE_ALERT_CEILING:
+        return base * 2
+    return base
+
+
+async def _monitor_loop(app: Application) -> None:
+    """Run check_and_alert periodically on the bot's own event loop.
+
+    A plain asyncio task replaces the APScheduler dependency: one
+    periodic job does not need a job store or executor threads, and the
+    try/except keeps a failed tick from killing the loop.
+    """
+    while True:
+        await asyncio.sleep(_next_monitor_delay())
+        try:
+            await check_and_alert(app)
+        except Exception as e:
+            logger.error(f"Monitor tick failed: {e}")
 
 
 def main() -> None:
@@ -1141,81 +1674,80 @@ def main() -> None:
         return
     
     # Create application
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # concurrent_updates lets the event loop overlap I/O-bound handlers
+    # across users instead of processing updates strictly one at a time
+    # The rate limiter queues outgoing requests below Telegram's limits
+    # instead of letting bursts trigger RetryAfter storms
+    # A larger keep-alive pool stops the concurrent broadcast from
+    # exhausting connections mid-flight ("pool timeout" errors)
+    # HTTP/2 multiplexes concurrent API calls over a couple of
+    # connections instead of one TCP+TLS handshake per pooled socket
+    request = HTTPXRequest(
+        connection_pool_size=128,
+        pool_timeout=30.0,
+        connect_timeout=10.0,
+        read_timeout=30.0,
+        http_version="2",
+    )
+    app = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, max_retries=3))
+        .request(request)
+        .build()
+    )
     
     # Add handlers
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("hashrate", hashrate))
-    app.add_handler(CommandHandler("proofrate", hashrate))
+    app.add_handler(CommandHandler("hashrate", hashrate, block=False))
+    app.add_handler(CommandHandler("proofrate", hashrate, block=False))
     app.add_handler(CommandHandler("subscribe", subscribe))
     app.add_handler(CommandHandler("unsubscribe", unsubscribe))
     app.add_handler(CommandHandler("subscription", subscription))
     app.add_handler(CommandHandler("setalerts", setalerts))
     app.add_handler(CommandHandler("resetalerts", resetalerts))
-    app.add_handler(CommandHandler("status", status))
-    app.add_handler(CommandHandler("tip", tip))
-    app.add_handler(CommandHandler("volume", volume))
+    app.add_handler(CommandHandler("status", status, block=False))
+    app.add_handler(CommandHandler("tip", tip, block=False))
+    app.add_handler(CommandHandler("volume", volume, block=False))
     app.add_handler(CallbackQueryHandler(button_callback))
-    app.add_handler(InlineQueryHandler(inline_query))
+    app.add_handler(InlineQueryHandler(inline_query, block=False))
     app.add_handler(ChatMemberHandler(track_chat_membership, ChatMemberHandler.MY_CHAT_MEMBER))
     
     # Payment handlers
     app.add_handler(PreCheckoutQueryHandler(precheckout_callback))
     app.add_handler(MessageHandler(filters.SUCCESSFUL_PAYMENT, successful_payment_callback))
     
-    # Set up periodic monitoring
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        check_and_alert,
-        'interval',
-        minutes=MONITOR_INTERVAL_MINUTES,
-        args=[app],
-        id='metrics_check',
-        name='Check Nockchain metrics',
-    )
-    
     async def on_startup(app: Application) -> None:
-        """Start the scheduler and set bot commands when the bot starts."""
-        scheduler.start()
-        logger.info(f"Scheduler started. Checking every {MONITOR_INTERVAL_MINUTES} minutes.")
-        
-        # Set bot commands via API (https://core.telegram.org/bots/api#setmycommands)
-        # Commands for private chats (full feature set)
-        private_commands = [
-            BotCommand("start", "Start the bot and see options"),
-            BotCommand("proofrate", "Get current mining metrics"),
-            BotCommand("tip", "Get latest block info"),
-            BotCommand("volume", "Get 24h transaction volume"),
-            BotCommand("subscribe", "Subscribe to proofrate alerts"),
-            BotCommand("subscription", "Check your subscription status"),
-            BotCommand("setalerts", "Set custom alert thresholds"),
-            BotCommand("resetalerts", "Reset to default thresholds"),
-            BotCommand("unsubscribe", "Stop receiving alerts"),
-            BotCommand("status", "Check bot status"),
-            BotCommand("help", "Show all commands"),
-        ]
-        
-        # Commands for group chats (info only, no subscription management)
-        group_commands = [
-            BotCommand("start", "Start private chat with bot"),
-            BotCommand("proofrate", "Get current mining metrics"),
-            BotCommand("tip", "Get latest block info"),
-            BotCommand("volume", "Get 24h transaction volume"),
-            BotCommand("status", "Check bot status"),
-            BotCommand("help", "Show all commands"),
-        ]
+        """Start the background tasks and set bot commands when the bot starts."""
+        global _save_flusher_task, _monitor_task
+        _save_flusher_task = asyncio.create_task(_save_flusher())
+
+        _monitor_task = asyncio.create_task(_monitor_loop(app))
+        logger.info(f"Monitor started. Checking every {MONITOR_INTERVAL_MINUTES} minutes.")
         
-        # Register commands for all scopes
-        await app.bot.set_my_commands(private_commands, scope=BotCommandScopeDefault())
-        await app.bot.set_my_commands(private_commands, scope=BotCommandScopeAllPrivateChats())
-        await app.bot.set_my_commands(group_commands, scope=BotCommandScopeAllGroupChats())
+        # Register the prebuilt command lists for all scopes
+        await app.bot.set_my_commands(_COMMANDS_PRIVATE, scope=BotCommandScopeDefault())
+        await app.bot.set_my_commands(_COMMANDS_PRIVATE, scope=BotCommandScopeAllPrivateChats())
+        await app.bot.set_my_commands(_COMMANDS_GROUP, scope=BotCommandScopeAllGroupChats())
         logger.info("Bot commands registered for all scopes.")
     
     async def on_shutdown(app: Application) -> None:
-        """Stop the scheduler when the bot stops."""
-        scheduler.shutdown()
-        logger.info("Scheduler stopped.")
+        """Stop the background tasks when the bot stops."""
+        if _monitor_task:
+            _monitor_task.cancel()
+        logger.info("Monitor stopped.")
+
+        # Flush any pending subscriber writes before exiting
+        if _save_flusher_task:
+            _save_flusher_task.cancel()
+        if _save_dirty.is_set():
+            save_subscribers()
+        _save_state()
+
+        # Release the shared upstream HTTP client
+        await scraper.aclose()
     
     # Global error handler for transient network issues (timeouts, etc.)
     async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
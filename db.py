@@ -0,0 +1,67 @@
+"""SQLite-backed persistence for Nockbot subscribers."""
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+@dataclass(slots=True)
+class Subscription:
+    """In-memory subscriber record; one row of the subscribers table.
+
+    slots=True keeps each record at a fraction of a plain dict's
+    footprint, which matters when the whole table lives in memory.
+    """
+    type: str = "user"
+    expiry: int = 0
+    floor: Optional[float] = None
+    ceiling: Optional[float] = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    id      INTEGER PRIMARY KEY,
+    type    TEXT NOT NULL DEFAULT 'user',
+    expiry  INTEGER NOT NULL DEFAULT 0,
+    floor   REAL,
+    ceiling REAL
+)
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open (and initialize) the subscribers database.
+
+    WAL mode gives durable O(1) row updates instead of full-file rewrites,
+    and lets the background flusher write from a worker thread.
+    """
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def load_all(conn: sqlite3.Connection) -> dict[int, Subscription]:
+    """Load every subscriber row into the in-memory form used by bot.py."""
+    rows = conn.execute("SELECT id, type, expiry, floor, ceiling FROM subscribers")
+    return {
+        row[0]: Subscription(type=row[1], expiry=row[2], floor=row[3], ceiling=row[4])
+        for row in rows
+    }
+
+
+def upsert_many(conn: sqlite3.Connection, items: Iterable[tuple[int, Subscription]]) -> None:
+    """Insert or replace a batch of (id, Subscription) rows."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO subscribers (id, type, expiry, floor, ceiling) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (sub_id, sub.type, sub.expiry, sub.floor, sub.ceiling)
+            for sub_id, sub in items
+        ],
+    )
+
+
+def delete_many(conn: sqlite3.Connection, ids: Iterable[int]) -> None:
+    """Delete a batch of subscriber rows by id."""
+    conn.executemany("DELETE FROM subscribers WHERE id = ?", [(i,) for i in ids])
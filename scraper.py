@@ -2,11 +2,19 @@
 import asyncio
 import re
 import math
+import time
 from dataclasses import dataclass
 from typing import Optional
 
 import httpx
 
+# orjson parses the RPC responses several times faster than stdlib json;
+# fall back silently if it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config import NOCKBLOCKS_API_KEY
 
 
@@ -77,6 +85,11 @@ class NockBlocksAPI:
         self.api_key = api_key
         self.client = httpx.AsyncClient(
             timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=32,
+                max_keepalive_connections=32,
+                keepalive_expiry=60.0,
+            ),
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
@@ -106,7 +119,10 @@ class NockBlocksAPI:
             }
             response = await self.client.post(self.RPC_V1_URL, json=payload)
             response.raise_for_status()
-            data = response.json()
+            if orjson is not None:
+                data = orjson.loads(response.content)
+            else:
+                data = response.json()
             
             if "error" in data:
                 print(f"RPC error: {data['error']}")
@@ -138,8 +154,6 @@ class NockBlocksAPI:
     
     async def fetch_24h_volume(self) -> Optional[dict]:
         """Fetch 24-hour transaction volume."""
-        import time
-        
         now = int(time.time())
         day_ago = now - 86400
         
@@ -347,43 +361,102 @@ class NockBlocksAPI:
         )
 
 
-async def get_metrics() -> Optional[MiningMetrics]:
-    """Get metrics using the NockBlocks API."""
-    if not NOCKBLOCKS_API_KEY:
-        print("Warning: NOCKBLOCKS_API_KEY not set")
-        return None
-    
-    api = NockBlocksAPI(NOCKBLOCKS_API_KEY)
+# Cache TTLs in seconds, tuned per endpoint: blocks arrive ~1/min so the tip
+# can be fresher; the 24h volume walk is expensive and changes slowly
+TTL_METRICS = 30
+TTL_TIP = 10
+TTL_VOLUME = 60
+
+_cache: dict[str, tuple[float, object]] = {}
+_inflight: dict[str, asyncio.Future] = {}
+
+
+async def _cached(key: str, ttl: float, fetcher):
+    """Return a cached value for `key`, fetching at most once per TTL.
+
+    Concurrent callers during a miss await the same in-flight future
+    (single-flight), so a burst of commands produces one upstream fetch.
+    Failed fetches (None) are not cached.
+    """
+    hit = _cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+
+    fut = _inflight.get(key)
+    if fut is not None:
+        return await fut
+
+    fut = asyncio.ensure_future(fetcher())
+    _inflight[key] = fut
     try:
-        return await api.fetch_metrics()
+        value = await fut
     finally:
-        await api.close()
+        _inflight.pop(key, None)
+    if value is not None:
+        _cache[key] = (time.monotonic(), value)
+    return value
 
 
-async def get_tip() -> Optional[dict]:
-    """Get the latest block (chain tip)."""
+# Shared API client so every fetch reuses one warm keep-alive connection
+# pool instead of paying a TCP+TLS handshake per call
+_api: Optional[NockBlocksAPI] = None
+
+
+def _get_api() -> Optional[NockBlocksAPI]:
+    global _api
     if not NOCKBLOCKS_API_KEY:
         print("Warning: NOCKBLOCKS_API_KEY not set")
         return None
-    
-    api = NockBlocksAPI(NOCKBLOCKS_API_KEY)
-    try:
-        return await api.get_tip()
-    finally:
-        await api.close()
+    if _api is None:
+        _api = NockBlocksAPI(NOCKBLOCKS_API_KEY)
+    return _api
 
 
-async def get_24h_volume() -> Optional[dict]:
-    """Get 24-hour transaction volume."""
-    if not NOCKBLOCKS_API_KEY:
-        print("Warning: NOCKBLOCKS_API_KEY not set")
+async def aclose() -> None:
+    """Close the shared API client (call once at shutdown)."""
+    global _api
+    if _api is not None:
+        await _api.close()
+        _api = None
+
+
+async def _fetch_metrics() -> Optional[MiningMetrics]:
+    """Fetch metrics from the NockBlocks API (uncached)."""
+    api = _get_api()
+    if api is None:
         return None
-    
-    api = NockBlocksAPI(NOCKBLOCKS_API_KEY)
-    try:
-        return await api.fetch_24h_volume()
-    finally:
-        await api.close()
+    return await api.fetch_metrics()
+
+
+async def _fetch_tip() -> Optional[dict]:
+    """Fetch the latest block (chain tip) from the NockBlocks API (uncached)."""
+    api = _get_api()
+    if api is None:
+        return None
+    return await api.get_tip()
+
+
+async def _fetch_24h_volume() -> Optional[dict]:
+    """Fetch 24-hour transaction volume from the NockBlocks API (uncached)."""
+    api = _get_api()
+    if api is None:
+        return None
+    return await api.fetch_24h_volume()
+
+
+async def get_metrics() -> Optional[MiningMetrics]:
+    """Get mining metrics, cached for TTL_METRICS seconds."""
+    return await _cached("metrics", TTL_METRICS, _fetch_metrics)
+
+
+async def get_tip() -> Optional[dict]:
+    """Get the latest block (chain tip), cached for TTL_TIP seconds."""
+    return await _cached("tip", TTL_TIP, _fetch_tip)
+
+
+async def get_24h_volume() -> Optional[dict]:
+    """Get 24-hour transaction volume, cached for TTL_VOLUME seconds."""
+    return await _cached("volume", TTL_VOLUME, _fetch_24h_volume)
 
 
 # Test